@@ -12,15 +12,19 @@ Usage:
 """
 
 import argparse
+import base64
 import http.server
 import json
 import os
+import queue
+import struct
 import time
-import uuid
+import secrets
 import threading
 import logging
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime, timezone
+from typing import BinaryIO
 
 logging.basicConfig(
     level=logging.INFO,
@@ -34,58 +38,283 @@ log = logging.getLogger(__name__)
 DEFAULT_QUEUE_DIR = r"H:\queue"
 DEFAULT_PORT = 8080
 POLL_INTERVAL = 0.3        # seconds between checking for response file
+STREAM_POLL_INTERVAL = 0.05 # seconds between reads of an open stream file
 REQUEST_TIMEOUT = 300       # seconds before giving up on a response
 CLEANUP_AFTER = True        # delete request/response files after use
+SPOOL_THRESHOLD = 1024 * 1024  # request bodies larger than this go to a sidecar file, not the envelope
+COPY_CHUNK_SIZE = 64 * 1024    # bytes per read when copying a body to the sidecar file
+COPY_BUFFER_POOL = 8           # idle copy buffers kept for reuse by later requests
+
+_O_BINARY = getattr(os, "O_BINARY", 0)  # Windows: no newline translation on raw fds
+_FADV_DONTNEED = getattr(os, "POSIX_FADV_DONTNEED", None)  # Linux/Unix only; Windows has no stdlib equivalent
+_FRAME_HEADER = struct.Struct("<I")     # length prefix of each frame in a .stream file
+
+# Binary queue files (see README); must match fs_proxy_server.py
+_REQ_HEADER = struct.Struct("<16sQBBHIQ")  # id, ts_ns, method, flags, path_len, headers_len, body_len
+_RESP_HEADER = struct.Struct("<16sQHIQ")   # id, ts_ns, status_code, headers_len, body_len
+_HEADER_COUNT = struct.Struct("<H")
+_HEADER_ITEM = struct.Struct("<HH")        # name length, value length
+_METHODS = ("GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS", "HEAD")
+_FLAG_STREAM = 0x01
+
+# Hop-by-hop headers that are not forwarded (compared lowercased)
+_SKIP_HEADERS = frozenset({"host", "connection", "transfer-encoding", "keep-alive"})
+_SKIP_RESP_HEADERS = frozenset({"transfer-encoding", "connection"})
+
+
+def _atomic_write_bytes(dir_str: str, name: str, data: bytes):
+    """Write data to dir_str/name via a .tmp file and a rename, so readers never see a partial file."""
+    tmp_path = os.path.join(dir_str, name + ".tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY)
+    try:
+        _write_all(fd, data)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, os.path.join(dir_str, name))
+
+
+# Shared by all handler threads: ThreadingHTTPServer starts a new thread per connection, so
+# buffers must outlive the thread to be reused by the next request
+_copy_buffers: queue.LifoQueue = queue.LifoQueue(maxsize=COPY_BUFFER_POOL)
+
+
+@contextmanager
+def _copy_buffer():
+    """Borrow a COPY_CHUNK_SIZE buffer for a chunked copy (filled via readinto), then return it."""
+    try:
+        buf = _copy_buffers.get_nowait()
+    except queue.Empty:
+        buf = memoryview(bytearray(COPY_CHUNK_SIZE))
+    try:
+        yield buf
+    finally:
+        try:
+            _copy_buffers.put_nowait(buf)
+        except queue.Full:
+            pass
+
+
+def _drop_cache(fd: int):
+    """Tell the OS it can evict this queue file from the page cache (no-op where unsupported).
+
+    Only used after reading: queue files are read once and then deleted. On dirty pages the
+    hint would start writeback of files that are usually deleted before they reach the disk.
+    """
+    if _FADV_DONTNEED is not None:
+        try:
+            os.posix_fadvise(fd, 0, 0, _FADV_DONTNEED)
+        except OSError:
+            pass
+
+
+def _write_all(fd: int, data: bytes):
+    """os.write() until all of data is written."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _encode_request_envelope(request_id: str, ts_ns: int, method: str, path: str, headers: dict,
+                             body_b64: bytes | None, body_file: str | None, stream: bool) -> bytes:
+    """Serialize a request envelope without running the base64 body through json.dumps.
+
+    The id (hex), method (an HTTP verb), timestamp, base64 body and sidecar name need no
+    escaping; only path and headers go through json.dumps.
+    """
+    parts = [
+        b'{"id": "', request_id.encode("ascii"),
+        b'", "ts_ns": ', b"%d" % ts_ns,
+        b', "method": "', method.encode("ascii"),
+        b'", "path": ', json.dumps(path).encode("utf-8"),
+        b', "headers": ', json.dumps(headers).encode("utf-8"),
+        b', "body_b64": ', b'"%s"' % body_b64 if body_b64 else b"null",
+    ]
+    if body_file:
+        parts += (b', "body_file": "', body_file.encode("ascii"), b'"')
+    if stream:
+        parts.append(b', "stream": true')
+    parts.append(b"}")
+    return b"".join(parts)
+
+
+def _pack_headers(headers: dict) -> bytes:
+    """Serialize headers as [count][(name_len, value_len, name, value)*].
+
+    Latin-1, as http.server and http.client decode them, so every byte maps back to one
+    character and each field stays within the 64 KiB header line limit.
+    """
+    parts = [_HEADER_COUNT.pack(len(headers))]
+    for k, v in headers.items():
+        kb = k.encode("latin-1")
+        vb = v.encode("latin-1")
+        parts += (_HEADER_ITEM.pack(len(kb), len(vb)), kb, vb)
+    return b"".join(parts)
+
+
+def _unpack_headers(data: bytes) -> dict:
+    """Inverse of _pack_headers."""
+    try:
+        (count,) = _HEADER_COUNT.unpack_from(data)
+        pos = _HEADER_COUNT.size
+        headers = {}
+        for _ in range(count):
+            klen, vlen = _HEADER_ITEM.unpack_from(data, pos)
+            pos += _HEADER_ITEM.size
+            headers[data[pos:pos + klen].decode("latin-1")] = data[pos + klen:pos + klen + vlen].decode("latin-1")
+            pos += klen + vlen
+    except struct.error as e:
+        raise ValueError(f"Malformed headers: {e}") from None
+    return headers
+
+
+def _read_binary_response(f: BinaryIO, name: str) -> dict:
+    """Parse a .resp file into a response dict.
+
+    Bodies over SPOOL_THRESHOLD are left in the file: the dict then names it as body_file,
+    with the offset the body starts at.
+    """
+    try:
+        _raw_id, _ts_ns, status_code, headers_len, body_len = _RESP_HEADER.unpack(f.read(_RESP_HEADER.size))
+    except struct.error as e:
+        raise ValueError(f"Malformed response header: {e}") from None
+    response = {"status_code": status_code, "headers": _unpack_headers(f.read(headers_len))}
+    if body_len > SPOOL_THRESHOLD:
+        response["body_file"] = name
+        response["body_offset"] = f.tell()
+        return response
+    response["body"] = f.read(body_len)
+    if len(response["body"]) < body_len:
+        raise ValueError("Truncated response file")
+    _drop_cache(f.fileno())
+    return response
+
+
+def _pop_frames(buf: bytearray) -> list[bytes]:
+    """Remove and return the complete length-prefixed frames at the start of buf."""
+    frames = []
+    pos = 0
+    while len(buf) - pos >= _FRAME_HEADER.size:
+        (size,) = _FRAME_HEADER.unpack_from(buf, pos)
+        end = pos + _FRAME_HEADER.size + size
+        if end > len(buf):
+            break
+        frames.append(bytes(buf[pos + _FRAME_HEADER.size:end]))
+        pos = end
+    del buf[:pos]
+    return frames
+
+
+def _error_response(status_code: int, message: str, error_type: str) -> dict:
+    """Build a response envelope for an error raised by the proxy itself."""
+    body = json.dumps({"error": {"message": message, "type": error_type}}).encode("utf-8")
+    return {
+        "status_code": status_code,
+        "headers": {"Content-Type": "application/json"},
+        "body_b64": base64.b64encode(body).decode("ascii"),
+    }
+
+
+class ResponseWatcher:
+    """Single background thread that scans the responses directory and wakes waiting requests.
+
+    Each pending request registers an event under its id; one directory listing per
+    poll interval replaces a stat loop in every request thread.
+    """
+
+    def __init__(self, responses_dir: str):
+        self.responses_dir = responses_dir
+        self.waiters: dict[str, threading.Event] = {}
+        self.lock = threading.Lock()
+        threading.Thread(target=self._run, name="response-watcher", daemon=True).start()
+
+    def register(self, request_id: str) -> threading.Event:
+        event = threading.Event()
+        with self.lock:
+            self.waiters[request_id] = event
+        return event
+
+    def unregister(self, request_id: str):
+        with self.lock:
+            self.waiters.pop(request_id, None)
+
+    def _run(self):
+        while True:
+            if self.waiters:
+                self._scan()
+            time.sleep(POLL_INTERVAL)
+
+    def _scan(self):
+        try:
+            with os.scandir(self.responses_dir) as entries:
+                names = [entry.name for entry in entries if not entry.name.endswith(".tmp")]
+        except OSError as e:
+            log.error(f"Error scanning responses: {e}")
+            return
+
+        with self.lock:
+            for name in names:
+                # <id>.resp / <id>.json, or <id>.stream / <id>-done.json for streams
+                stem = name.partition(".")[0]
+                event = self.waiters.get(stem) or self.waiters.get(stem.rpartition("-")[0])
+                if event:
+                    event.set()
 
 
 class FileSystemProxy:
-    """Handles writing requests and polling for responses on the shared drive."""
+    """Handles writing requests and waiting for responses on the shared drive."""
 
-    def __init__(self, queue_dir: str):
+    def __init__(self, queue_dir: str, legacy_json: bool = False):
         self.queue_dir = Path(queue_dir)
         self.requests_dir = self.queue_dir / "requests"
         self.responses_dir = self.queue_dir / "responses"
+        self._req_dir_str = str(self.requests_dir)
+
+        # Binary .req/.resp files by default; JSON envelopes are easier to inspect when debugging.
+        # The server answers in the format of the request.
+        self.legacy_json = legacy_json
+        self.req_ext = ".json" if legacy_json else ".req"
+        self.resp_ext = ".json" if legacy_json else ".resp"
 
         # Create directories if they don't exist
         self.requests_dir.mkdir(parents=True, exist_ok=True)
         self.responses_dir.mkdir(parents=True, exist_ok=True)
         log.info(f"Queue directory: {self.queue_dir}")
 
-    def send_request(self, method: str, path: str, headers: dict, body: bytes | None) -> dict:
-        """Write a request file and wait for the response file."""
-        request_id = str(uuid.uuid4())
+        self.watcher = ResponseWatcher(str(self.responses_dir))
 
-        # Build request envelope
-        request_data = {
-            "id": request_id,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "method": method,
-            "path": path,
-            "headers": headers,
-            "body": body.decode("utf-8") if body else None,
-        }
+    def send_request(self, method: str, path: str, headers: dict, body: bytes | None,
+                     body_stream: BinaryIO | None = None, body_length: int = 0) -> dict:
+        """Write a request file and wait for the response file.
 
-        # Write request file (write to .tmp first, then rename for atomicity)
-        req_file = self.requests_dir / f"{request_id}.json"
-        tmp_file = self.requests_dir / f"{request_id}.tmp"
-
-        with open(tmp_file, "w", encoding="utf-8") as f:
-            json.dump(request_data, f)
-        tmp_file.rename(req_file)
+        Instead of body, a large body can be given as body_stream/body_length; it is then
+        copied to the queue without being held in memory.
+        """
+        request_id = secrets.token_hex(16)
+        req_file = self.requests_dir / f"{request_id}{self.req_ext}"
+        try:
+            self.write_request(request_id, method, path, headers, body, body_stream, body_length)
+        except ValueError as e:
+            log.error(f"Request {request_id} rejected: {e}")
+            return _error_response(431, str(e), "proxy_error")
+        wakeup = self.watcher.register(request_id)
 
         log.info(f"Request {request_id} written — {method} {path}")
 
-        # Poll for response
-        resp_file = self.responses_dir / f"{request_id}.json"
+        # Wait for the response; the watcher sets wakeup once the file shows up
+        resp_file = self.responses_dir / f"{request_id}{self.resp_ext}"
         start = time.monotonic()
-
-        while time.monotonic() - start < REQUEST_TIMEOUT:
-            if resp_file.exists():
-                # Small delay to ensure the file is fully written
-                time.sleep(0.1)
-                try:
-                    with open(resp_file, "r", encoding="utf-8") as f:
-                        response_data = json.load(f)
+        deadline = start + REQUEST_TIMEOUT
+
+        try:
+            while time.monotonic() < deadline:
+                wakeup.clear()
+                if resp_file.exists():
+                    try:
+                        response_data = self._read_response(resp_file, deadline)
+                    except (ValueError, OSError) as e:
+                        # Leave the file in place for inspection
+                        log.error(f"Unreadable response {request_id}: {e}")
+                        return _error_response(502, f"Unreadable response file: {e}", "proxy_error")
 
                     elapsed = time.monotonic() - start
                     log.info(f"Response {request_id} received in {elapsed:.1f}s")
@@ -93,26 +322,119 @@ class FileSystemProxy:
                     if CLEANUP_AFTER:
                         try:
                             req_file.unlink(missing_ok=True)
-                            resp_file.unlink(missing_ok=True)
+                            # A large binary body is still to be copied from the file itself
+                            if response_data.get("body_file") != resp_file.name:
+                                resp_file.unlink(missing_ok=True)
                         except OSError:
                             pass
 
                     return response_data
-                except (json.JSONDecodeError, OSError):
-                    # File might still be written, retry
-                    time.sleep(0.2)
-                    continue
 
-            time.sleep(POLL_INTERVAL)
+                wakeup.wait(deadline - time.monotonic())
+        finally:
+            self.watcher.unregister(request_id)
 
         log.error(f"Request {request_id} timed out after {REQUEST_TIMEOUT}s")
         # Clean up orphaned request
         req_file.unlink(missing_ok=True)
-        return {
-            "status_code": 504,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps({"error": {"message": "Filesystem proxy timeout", "type": "timeout"}}),
-        }
+        (self.requests_dir / f"{request_id}.bin").unlink(missing_ok=True)
+        return _error_response(504, "Filesystem proxy timeout", "timeout")
+
+    def write_request(self, request_id: str, method: str, path: str, headers: dict, body: bytes | None,
+                      body_stream: BinaryIO | None = None, body_length: int = 0, stream: bool = False):
+        """Write a request file: binary .req, or a JSON envelope in legacy mode.
+
+        A .req file carries the body inline. A JSON envelope carries it as base64, and bodies
+        over SPOOL_THRESHOLD then go to a <id>.bin sidecar file.
+        """
+        if not self.legacy_json:
+            self._write_binary_request(request_id, method, path, headers, body, body_stream, body_length, stream)
+            return
+
+        body_file = None
+        if body_stream is not None:
+            body_file = f"{request_id}.bin"
+            self._spool_body(body_file, body_stream, body_length)
+        elif body and len(body) > SPOOL_THRESHOLD:
+            body_file = f"{request_id}.bin"
+            _atomic_write_bytes(self._req_dir_str, body_file, body)
+            body = None
+
+        envelope = _encode_request_envelope(
+            request_id, time.time_ns(), method, path, headers,
+            base64.b64encode(body) if body else None, body_file, stream,
+        )
+
+        # Write request file (write to .tmp first, then rename for atomicity). The sidecar
+        # is already in place, so the server never sees an envelope without its body.
+        _atomic_write_bytes(self._req_dir_str, f"{request_id}.json", envelope)
+
+    def _write_binary_request(self, request_id: str, method: str, path: str, headers: dict, body: bytes | None,
+                              body_stream: BinaryIO | None, body_length: int, stream: bool):
+        """Write a <id>.req file: fixed header, path, headers, then the raw body.
+
+        Raises ValueError if the path or headers do not fit the format's length fields.
+        """
+        if body_stream is None:
+            body_length = len(body) if body else 0
+        try:
+            # Latin-1 like the request line http.server decoded it from
+            path_bytes = path.encode("latin-1")
+            packed_headers = _pack_headers(headers)
+            head = _REQ_HEADER.pack(
+                bytes.fromhex(request_id), time.time_ns(), _METHODS.index(method), _FLAG_STREAM if stream else 0,
+                len(path_bytes), len(packed_headers), body_length,
+            ) + path_bytes + packed_headers
+        except struct.error as e:
+            raise ValueError(f"Request line or headers too large for the queue file: {e}") from None
+
+        name = f"{request_id}.req"
+        if body_stream is not None:
+            self._spool_body(name, body_stream, body_length, head)
+        else:
+            _atomic_write_bytes(self._req_dir_str, name, head + body if body else head)
+
+    def _spool_body(self, name: str, src: BinaryIO, length: int, head: bytes = b""):
+        """Write head, then length bytes copied from src chunk by chunk, to requests/<name>."""
+        tmp_path = os.path.join(self._req_dir_str, name + ".tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY)
+        try:
+            _write_all(fd, head)
+            with _copy_buffer() as buf:
+                remaining = length
+                while remaining:
+                    n = src.readinto(buf[:min(len(buf), remaining)])
+                    if not n:
+                        raise ConnectionError("Connection closed before the request body was complete")
+                    _write_all(fd, buf[:n])
+                    remaining -= n
+        except BaseException:
+            os.close(fd)
+            os.unlink(tmp_path)
+            raise
+        os.close(fd)
+        os.replace(tmp_path, os.path.join(self._req_dir_str, name))
+
+    def _read_response(self, resp_file: Path, deadline: float) -> dict:
+        """Read a response file; the server renames it into place only once complete.
+
+        OSError (e.g. an SMB sharing violation right after the rename) is retried
+        with backoff until the deadline; ValueError means the file is malformed.
+        """
+        delay = 0.01
+        while True:
+            try:
+                with open(resp_file, "rb") as f:
+                    if not self.legacy_json:
+                        return _read_binary_response(f, resp_file.name)
+                    data = f.read()
+                    _drop_cache(f.fileno())
+                return json.loads(data)
+            except OSError:
+                if time.monotonic() + delay >= deadline:
+                    raise
+                time.sleep(delay)
+                delay = min(delay * 2, POLL_INTERVAL)
 
 
 class ProxyHTTPHandler(http.server.BaseHTTPRequestHandler):
@@ -121,41 +443,57 @@ class ProxyHTTPHandler(http.server.BaseHTTPRequestHandler):
     proxy: FileSystemProxy  # set on the class before serving
 
     def do_request(self):
-        # Read body if present
+        # Read body if present; large bodies are copied from the socket straight to the queue
         content_length = int(self.headers.get("Content-Length", 0))
-        body = self.rfile.read(content_length) if content_length > 0 else None
-
-        # Collect headers (skip hop-by-hop)
-        skip_headers = {"host", "connection", "transfer-encoding", "keep-alive"}
-        headers = {
-            k: v
-            for k, v in self.headers.items()
-            if k.lower() not in skip_headers
-        }
+        body = None
+        body_stream = None
+        if content_length > SPOOL_THRESHOLD:
+            body_stream = self.rfile
+        elif content_length > 0:
+            body = self.rfile.read(content_length)
 
         # Send through filesystem
         response = self.proxy.send_request(
             method=self.command,
             path=self.path,
-            headers=headers,
+            headers=self._forward_headers(),
             body=body,
+            body_stream=body_stream,
+            body_length=content_length,
         )
+        self._send_envelope(response)
 
-        # Write HTTP response back to the AI agent
-        status = response.get("status_code", 500)
-        resp_headers = response.get("headers", {})
-        resp_body = response.get("body", "")
+    def _forward_headers(self) -> dict:
+        """Collect the request headers to forward (skip hop-by-hop)."""
+        return {k: v for k, v in self.headers.items() if k.lower() not in _SKIP_HEADERS}
 
-        self.send_response(status)
-        for k, v in resp_headers.items():
-            if k.lower() not in ("transfer-encoding", "connection"):
+    def _send_envelope(self, response: dict):
+        """Write a response envelope back to the AI agent."""
+        self.send_response(response.get("status_code", 500))
+        for k, v in response.get("headers", {}).items():
+            if k.lower() not in _SKIP_RESP_HEADERS:
                 self.send_header(k, v)
         self.end_headers()
 
-        if isinstance(resp_body, str):
-            self.wfile.write(resp_body.encode("utf-8"))
-        elif isinstance(resp_body, bytes):
-            self.wfile.write(resp_body)
+        resp_body = response.get("body_b64")
+        if resp_body:
+            self.wfile.write(base64.b64decode(resp_body))
+        if response.get("body"):
+            self.wfile.write(response["body"])
+
+        body_file = response.get("body_file")
+        if body_file:
+            # Large body: copy the sidecar (or the .resp file past its header) to the socket
+            # chunk by chunk, then remove it
+            body_path = self.proxy.responses_dir / os.path.basename(body_file)
+            try:
+                with open(body_path, "rb") as f, _copy_buffer() as buf:
+                    f.seek(response.get("body_offset", 0))
+                    while n := f.readinto(buf):
+                        self.wfile.write(buf[:n])
+                    _drop_cache(f.fileno())
+            finally:
+                body_path.unlink(missing_ok=True)
 
     # Handle all HTTP methods
     do_GET = do_request
@@ -182,14 +520,11 @@ class StreamingProxyHTTPHandler(ProxyHTTPHandler):
             try:
                 req_json = json.loads(body)
                 is_streaming = req_json.get("stream", False)
-            except json.JSONDecodeError:
+            except ValueError:
+                # Not JSON (or not UTF-8): forward as-is
                 pass
 
-        skip_headers = {"host", "connection", "transfer-encoding", "keep-alive"}
-        headers = {
-            k: v for k, v in self.headers.items()
-            if k.lower() not in skip_headers
-        }
+        headers = self._forward_headers()
 
         if not is_streaming:
             # Non-streaming: use normal flow
@@ -197,34 +532,19 @@ class StreamingProxyHTTPHandler(ProxyHTTPHandler):
                 method=self.command, path=self.path,
                 headers=headers, body=body,
             )
-            status = response.get("status_code", 500)
-            resp_headers = response.get("headers", {})
-            resp_body = response.get("body", "")
-            self.send_response(status)
-            for k, v in resp_headers.items():
-                if k.lower() not in ("transfer-encoding", "connection"):
-                    self.send_header(k, v)
-            self.end_headers()
-            if isinstance(resp_body, str):
-                self.wfile.write(resp_body.encode("utf-8"))
+            self._send_envelope(response)
             return
 
-        # Streaming: write request, then poll for chunk files
-        request_id = str(uuid.uuid4())
-        request_data = {
-            "id": request_id,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "method": self.command,
-            "path": self.path,
-            "headers": headers,
-            "body": body.decode("utf-8") if body else None,
-            "stream": True,
-        }
-        req_file = self.proxy.requests_dir / f"{request_id}.json"
-        tmp_file = self.proxy.requests_dir / f"{request_id}.tmp"
-        with open(tmp_file, "w", encoding="utf-8") as f:
-            json.dump(request_data, f)
-        tmp_file.rename(req_file)
+        # Streaming: write request, then tail the stream file
+        request_id = secrets.token_hex(16)
+        req_file = self.proxy.requests_dir / f"{request_id}{self.proxy.req_ext}"
+        try:
+            self.proxy.write_request(request_id, self.command, self.path, headers, body, stream=True)
+        except ValueError as e:
+            log.error(f"Streaming request {request_id} rejected: {e}")
+            self._send_envelope(_error_response(431, str(e), "proxy_error"))
+            return
+        wakeup = self.proxy.watcher.register(request_id)
         log.info(f"Streaming request {request_id} written")
 
         # Send SSE headers
@@ -233,37 +553,58 @@ class StreamingProxyHTTPHandler(ProxyHTTPHandler):
         self.send_header("Cache-Control", "no-cache")
         self.end_headers()
 
-        # Poll for stream chunk files: resp-<id>-<seq>.json, resp-<id>-done.json
-        seq = 0
+        # Tail <id>.stream (length-prefixed SSE data frames) until <id>-done.json appears
+        stream_file = self.proxy.responses_dir / f"{request_id}.stream"
+        done_file = self.proxy.responses_dir / f"{request_id}-done.json"
+        stream = None
+        pending = bytearray()
+        frame_count = 0
         start = time.monotonic()
-        while time.monotonic() - start < REQUEST_TIMEOUT:
-            # Check for next chunk
-            chunk_file = self.proxy.responses_dir / f"{request_id}-{seq:06d}.json"
-            done_file = self.proxy.responses_dir / f"{request_id}-done.json"
-
-            if chunk_file.exists():
-                time.sleep(0.05)
-                try:
-                    with open(chunk_file, "r", encoding="utf-8") as f:
-                        chunk_data = f.read()
-                    self.wfile.write(f"data: {chunk_data}\n\n".encode("utf-8"))
+        try:
+            while time.monotonic() - start < REQUEST_TIMEOUT:
+                wakeup.clear()
+                if stream is None:
+                    try:
+                        stream = open(stream_file, "rb")
+                    except FileNotFoundError:
+                        pass
+
+                # Checked before reading: the server closes the stream file before
+                # writing the done marker, so this read then returns everything left
+                done = done_file.exists()
+
+                if stream is not None:
+                    data = stream.read()
+                    if data:
+                        pending += data
+                        frames = _pop_frames(pending)
+                        if frames:
+                            self.wfile.write(b"".join(b"data: " + frame + b"\n\n" for frame in frames))
+                            self.wfile.flush()
+                            frame_count += len(frames)
+                        start = time.monotonic()  # reset timeout on activity
+                        continue
+
+                if done:
+                    self.wfile.write(b"data: [DONE]\n\n")
                     self.wfile.flush()
-                    chunk_file.unlink(missing_ok=True)
-                    seq += 1
-                    start = time.monotonic()  # reset timeout on activity
-                except OSError:
-                    time.sleep(0.1)
-                continue
-
-            if done_file.exists():
-                self.wfile.write(b"data: [DONE]\n\n")
-                self.wfile.flush()
-                done_file.unlink(missing_ok=True)
-                req_file.unlink(missing_ok=True)
-                log.info(f"Stream {request_id} complete ({seq} chunks)")
-                return
-
-            time.sleep(POLL_INTERVAL)
+                    if stream is not None:
+                        _drop_cache(stream.fileno())
+                        stream.close()
+                        stream = None
+                    stream_file.unlink(missing_ok=True)
+                    done_file.unlink(missing_ok=True)
+                    req_file.unlink(missing_ok=True)
+                    log.info(f"Stream {request_id} complete ({frame_count} frames)")
+                    return
+
+                # Once the stream file is open, tail it; until then wait for the watcher
+                remaining = REQUEST_TIMEOUT - (time.monotonic() - start)
+                wakeup.wait(min(STREAM_POLL_INTERVAL, remaining) if stream else remaining)
+        finally:
+            self.proxy.watcher.unregister(request_id)
+            if stream is not None:
+                stream.close()
 
         log.error(f"Stream {request_id} timed out")
 
@@ -282,16 +623,19 @@ def main():
     parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Local port to listen on")
     parser.add_argument("--timeout", type=int, default=REQUEST_TIMEOUT, help="Response timeout in seconds")
     parser.add_argument("--streaming", action="store_true", help="Enable SSE streaming support")
+    parser.add_argument("--legacy-json", action="store_true",
+                        help="Write JSON request envelopes instead of binary files (for debugging)")
     args = parser.parse_args()
 
     REQUEST_TIMEOUT = args.timeout
 
-    proxy = FileSystemProxy(args.queue_dir)
+    proxy = FileSystemProxy(args.queue_dir, legacy_json=args.legacy_json)
 
     handler_class = StreamingProxyHTTPHandler if args.streaming else ProxyHTTPHandler
     handler_class.proxy = proxy
 
-    server = http.server.HTTPServer(("127.0.0.1", args.port), handler_class)
+    # One thread per connection; they block on the response watcher instead of polling
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", args.port), handler_class)
     log.info(f"Listening on http://127.0.0.1:{args.port}")
     log.info(f"Configure your AI agent with: OPENAI_API_BASE=http://127.0.0.1:{args.port}/v1")
     log.info("Press Ctrl+C to stop")
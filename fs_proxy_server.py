@@ -12,15 +12,37 @@ Usage:
 """
 
 import argparse
+import base64
 import json
 import os
+import socket
+import struct
 import time
 import logging
 import threading
 import urllib3
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
-from datetime import datetime, timezone
+from typing import BinaryIO, Iterable, Iterator
+
+try:
+    # Optional: faster JSON encode/decode of the envelopes
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # Optional: wake up on filesystem events instead of waiting out the poll interval
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
 
 logging.basicConfig(
     level=logging.INFO,
@@ -34,56 +56,245 @@ log = logging.getLogger(__name__)
 DEFAULT_QUEUE_DIR = r"H:\queue"
 DEFAULT_API_BASE = "http://localhost:11434/v1"
 POLL_INTERVAL = 0.3          # seconds between scanning for new requests
+FALLBACK_POLL_INTERVAL = 1.0 # rescan interval when watchdog events are available (SMB may drop events)
 MAX_WORKERS = 4              # concurrent request handlers
+PENDING_PER_WORKER = 2       # requests picked up per worker before scanning pauses
+POOL_RESTART_DELAY = 1.0     # seconds to wait before replacing a broken worker process pool
 REQUEST_TIMEOUT = 120        # timeout for upstream HTTP requests
+SPOOL_THRESHOLD = 1024 * 1024  # response bodies larger than this go to a sidecar file, not the envelope
+COPY_CHUNK_SIZE = 64 * 1024    # bytes per read when copying a response body to the sidecar file
+STREAM_READ_SIZE = 8192      # max bytes per read from the upstream SSE response; a read returns whatever has arrived
+
+_O_BINARY = getattr(os, "O_BINARY", 0)  # Windows: no newline translation on raw fds
+_FADV_DONTNEED = getattr(os, "POSIX_FADV_DONTNEED", None)  # Linux/Unix only; Windows has no stdlib equivalent
+_FRAME_HEADER = struct.Struct("<I")     # length prefix of each frame in a .stream file
+
+# Binary queue files (see README). Readers unpack the fixed part, then slice the rest by its lengths.
+_REQUEST_EXTS = (".req", ".json")          # binary request, or a legacy JSON envelope
+_REQ_HEADER = struct.Struct("<16sQBBHIQ")  # id, ts_ns, method, flags, path_len, headers_len, body_len
+_RESP_HEADER = struct.Struct("<16sQHIQ")   # id, ts_ns, status_code, headers_len, body_len
+_HEADER_COUNT = struct.Struct("<H")
+_HEADER_ITEM = struct.Struct("<HH")        # name length, value length
+_METHODS = ("GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS", "HEAD")
+_FLAG_STREAM = 0x01
+
+
+if orjson is not None:
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+else:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    _json_loads = json.loads
+
+
+def _encode_response_envelope(request_id: str, ts_ns: int, status_code: int, headers: dict,
+                              body_b64: bytes | None, body_file: str | None = None) -> bytes:
+    """Serialize a response envelope without running the base64 body through the JSON encoder.
+
+    Timestamp, status and base64 body need no escaping. The id comes from the request file,
+    and so does the sidecar name built from it; both go through _json_dumps, like the headers.
+    """
+    parts = [
+        b'{"id": ', _json_dumps(request_id),
+        b', "ts_ns": ', b"%d" % ts_ns,
+        b', "status_code": ', b"%d" % status_code,
+        b', "headers": ', _json_dumps(headers),
+        b', "body_b64": ', b'"%s"' % body_b64 if body_b64 else b"null",
+    ]
+    if body_file:
+        parts += (b', "body_file": ', _json_dumps(body_file))
+    parts.append(b"}")
+    return b"".join(parts)
+
+
+def _pack_headers(headers: dict) -> bytes:
+    """Serialize headers as [count][(name_len, value_len, name, value)*].
+
+    Latin-1, as http.server and http.client decode them, so every byte maps back to one
+    character and each field stays within the 64 KiB header line limit.
+    """
+    parts = [_HEADER_COUNT.pack(len(headers))]
+    for k, v in headers.items():
+        kb = k.encode("latin-1")
+        vb = v.encode("latin-1")
+        parts += (_HEADER_ITEM.pack(len(kb), len(vb)), kb, vb)
+    return b"".join(parts)
+
+
+def _unpack_headers(data: bytes) -> dict:
+    """Inverse of _pack_headers."""
+    try:
+        (count,) = _HEADER_COUNT.unpack_from(data)
+        pos = _HEADER_COUNT.size
+        headers = {}
+        for _ in range(count):
+            klen, vlen = _HEADER_ITEM.unpack_from(data, pos)
+            pos += _HEADER_ITEM.size
+            headers[data[pos:pos + klen].decode("latin-1")] = data[pos + klen:pos + klen + vlen].decode("latin-1")
+            pos += klen + vlen
+    except struct.error as e:
+        raise ValueError(f"Malformed headers: {e}") from None
+    return headers
+
+
+def _read_binary_request(f: BinaryIO) -> dict:
+    """Parse a .req file up to its body, leaving f positioned at the body.
+
+    Returns the same fields as a JSON envelope, plus body_len.
+    """
+    try:
+        raw_id, _ts_ns, method_idx, flags, path_len, headers_len, body_len = _REQ_HEADER.unpack(
+            f.read(_REQ_HEADER.size))
+        method = _METHODS[method_idx]
+    except (struct.error, IndexError) as e:
+        raise ValueError(f"Malformed request header: {e}") from None
+    meta = f.read(path_len + headers_len)
+    if len(meta) < path_len + headers_len:
+        raise ValueError("Truncated request file")
+    return {
+        "id": raw_id.hex(),
+        "method": method,
+        "path": meta[:path_len].decode("latin-1"),
+        "headers": _unpack_headers(meta[path_len:]),
+        "stream": bool(flags & _FLAG_STREAM),
+        "body_len": body_len,
+    }
+
+
+def _encode_frames(frames: list[bytes]) -> bytes:
+    """Length-prefix each frame for a .stream file."""
+    return b"".join(_FRAME_HEADER.pack(len(frame)) + frame for frame in frames)
+
+
+def _iter_available(response: requests.Response) -> Iterator[bytes]:
+    """Yield the upstream body as it arrives: each read returns whatever data is available.
+
+    iter_content(n) waits for n bytes unless the response is chunked, which would hold back
+    SSE frames from HTTP/1.0 or close-delimited upstreams.
+    """
+    raw = response.raw
+    if not hasattr(raw, "read1"):
+        # urllib3 1.x: only single-byte reads are guaranteed not to wait for later data
+        yield from response.iter_content(1)
+        return
+    while chunk := raw.read1(STREAM_READ_SIZE, decode_content=True):
+        yield chunk
+
+
+def _iter_sse_batches(chunks) -> Iterator[list[bytes]]:
+    """Yield the raw payloads of the SSE `data:` lines completed by each chunk, stopping at [DONE].
+
+    One batch per upstream read, so callers can write it at once without waiting for more
+    data. Works on bytes throughout, so payloads are never decoded and re-encoded.
+    """
+    buf = bytearray()
+    for chunk in chunks:
+        buf += chunk
+        batch = []
+        start = 0
+        while (end := buf.find(b"\n", start)) != -1:
+            line = buf[start:end]
+            start = end + 1
+            if line.endswith(b"\r"):
+                line = line[:-1]
+            if line.startswith(b"data: "):
+                data = bytes(line[6:])
+                if data.strip() == b"[DONE]":
+                    if batch:
+                        yield batch
+                    return
+                batch.append(data)
+        del buf[:start]
+        if batch:
+            yield batch
+    if buf.startswith(b"data: ") and buf[6:].strip() != b"[DONE]":
+        yield [bytes(buf[6:].rstrip(b"\r"))]
+
+
+def _atomic_write_bytes(dir_str: str, name: str, data: bytes):
+    """Write data to dir_str/name via a .tmp file and a rename, so readers never see a partial file."""
+    tmp_path = os.path.join(dir_str, name + ".tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY)
+    try:
+        _write_all(fd, data)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, os.path.join(dir_str, name))
+
+
+def _drop_cache(fd: int):
+    """Tell the OS it can evict this queue file from the page cache (no-op where unsupported).
+
+    Only used after reading: queue files are read once and then deleted. On dirty pages the
+    hint would start writeback of files that are usually deleted before they reach the disk.
+    """
+    if _FADV_DONTNEED is not None:
+        try:
+            os.posix_fadvise(fd, 0, 0, _FADV_DONTNEED)
+        except OSError:
+            pass
 
 
-class FileSystemProxyServer:
-    """Watches for request files and forwards them to the AI model API."""
+def _write_all(fd: int, data: bytes):
+    """os.write() until all of data is written."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
 
-    def __init__(self, queue_dir: str, api_base: str, api_key: str | None = None,
-                 ignore_cert_errors: bool = False):
-        self.queue_dir = Path(queue_dir)
-        self.requests_dir = self.queue_dir / "requests"
-        self.responses_dir = self.queue_dir / "responses"
-        self.api_base = api_base.rstrip("/")
-        self.api_key = api_key
 
-        # Track processed files to avoid double-processing
-        self.processed: set[str] = set()
-        self.lock = threading.Lock()
+class UpstreamForwarder:
+    """Reads claimed request files, calls the AI model API and writes the responses."""
 
-        # Create dirs
-        self.requests_dir.mkdir(parents=True, exist_ok=True)
-        self.responses_dir.mkdir(parents=True, exist_ok=True)
+    def __init__(self, requests_dir: str, responses_dir: str, api_base: str, api_key: str | None = None,
+                 ignore_cert_errors: bool = False, pool_size: int = MAX_WORKERS):
+        self._req_dir_str = requests_dir
+        self._resp_dir_str = responses_dir
+        self.api_base = api_base
 
-        # Session for connection pooling
+        # Session for connection pooling, with a kept-alive connection per worker
         self.session = requests.Session()
-        if self.api_key:
-            self.session.headers["Authorization"] = f"Bearer {self.api_key}"
+        adapter = HTTPAdapter(pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
 
         if ignore_cert_errors:
             self.session.verify = False
             urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-            log.warning("TLS certificate verification is disabled")
 
-        log.info(f"Queue directory: {self.queue_dir}")
-        log.info(f"API base: {self.api_base}")
+    def process_request(self, req_path: str):
+        """Process a single claimed request file: binary .req, or a legacy .json envelope.
 
-    def process_request(self, req_file: Path):
-        """Process a single request file."""
+        A .req file stays open while the request is forwarded, since its body is sent from it.
+        """
+        binary = req_path.endswith(".req")
         try:
-            with open(req_file, "r", encoding="utf-8") as f:
-                request_data = json.load(f)
-        except (json.JSONDecodeError, OSError) as e:
-            log.error(f"Failed to read {req_file.name}: {e}")
-            return
-
+            with open(req_path, "rb") as f:
+                try:
+                    request_data = _read_binary_request(f) if binary else _json_loads(f.read())
+                except ValueError as e:
+                    log.error(f"Failed to read {os.path.basename(req_path)}: {e}")
+                    return
+                self._forward(request_data, f, binary)
+                _drop_cache(f.fileno())
+        except OSError as e:
+            log.error(f"Failed to read {os.path.basename(req_path)}: {e}")
+        finally:
+            # The claimed copy is not needed once handled (or found unreadable)
+            try:
+                os.unlink(req_path)
+            except OSError:
+                pass
+
+    def _forward(self, request_data: dict, req_file: BinaryIO, binary: bool):
+        """Call the upstream API for a parsed request and write the response in the same format."""
         request_id = request_data["id"]
         method = request_data.get("method", "POST").upper()
         path = request_data.get("path", "/")
         headers = request_data.get("headers", {})
-        body = request_data.get("body")
         is_streaming = request_data.get("stream", False)
 
         # Build upstream URL
@@ -91,134 +302,398 @@ class FileSystemProxyServer:
         log.info(f"Processing {request_id}: {method} {url} (stream={is_streaming})")
 
         try:
-            if is_streaming:
-                self._handle_streaming(request_id, method, url, headers, body)
-            else:
-                self._handle_normal(request_id, method, url, headers, body)
+            with self._request_body(request_data, req_file) as body:
+                if is_streaming:
+                    self._handle_streaming(request_id, method, url, headers, body)
+                else:
+                    self._handle_normal(request_id, method, url, headers, body, binary)
         except Exception as e:
             log.error(f"Error processing {request_id}: {e}")
-            self._write_error_response(request_id, str(e))
+            self._write_error_response(request_id, str(e), binary)
+
+    @contextmanager
+    def _request_body(self, request_data: dict, req_file: BinaryIO):
+        """Yield the request body as bytes, or as an open file positioned at a large body.
+
+        requests streams an open file upstream without reading it into memory. Large bodies
+        come from the rest of a .req file, or from the <id>.bin sidecar of a JSON envelope
+        (removed afterwards).
+        """
+        if "body_len" in request_data:
+            body_len = request_data["body_len"]
+            if body_len > SPOOL_THRESHOLD:
+                yield req_file
+            else:
+                yield req_file.read(body_len) if body_len else None
+            return
+
+        body_file = request_data.get("body_file")
+        if not body_file:
+            body_b64 = request_data.get("body_b64")
+            yield base64.b64decode(body_b64) if body_b64 else None
+            return
 
-    def _handle_normal(self, request_id: str, method: str, url: str, headers: dict, body: str | None):
+        body_path = os.path.join(self._req_dir_str, os.path.basename(body_file))
+        try:
+            with open(body_path, "rb") as f:
+                yield f
+                _drop_cache(f.fileno())
+        finally:
+            try:
+                os.unlink(body_path)
+            except OSError:
+                pass
+
+    def _handle_normal(self, request_id: str, method: str, url: str, headers: dict, body: bytes | BinaryIO | None,
+                       binary: bool):
         """Handle a normal (non-streaming) request."""
-        response = self.session.request(
+        with self.session.request(
             method=method,
             url=url,
             headers=headers,
-            data=body.encode("utf-8") if body else None,
+            data=body,
             timeout=REQUEST_TIMEOUT,
+            stream=True,
+        ) as response:
+            if binary:
+                self._write_binary_response(request_id, response.status_code, dict(response.headers),
+                                            response.iter_content(COPY_CHUNK_SIZE))
+                log.info(f"Response {request_id} written (HTTP {response.status_code})")
+                return
+            resp_body, body_file = self._read_response_body(request_id, response)
+
+        # Write response (atomic via rename); a sidecar body file is already in place
+        envelope = _encode_response_envelope(
+            request_id, time.time_ns(), response.status_code, dict(response.headers),
+            base64.b64encode(resp_body) if resp_body else None, body_file,
         )
-
-        # Build response envelope
-        response_data = {
-            "id": request_id,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "status_code": response.status_code,
-            "headers": dict(response.headers),
-            "body": response.text,
-        }
-
-        # Write response (atomic via rename)
-        resp_file = self.responses_dir / f"{request_id}.json"
-        tmp_file = self.responses_dir / f"{request_id}.tmp"
-        with open(tmp_file, "w", encoding="utf-8") as f:
-            json.dump(response_data, f)
-        tmp_file.rename(resp_file)
+        _atomic_write_bytes(self._resp_dir_str, f"{request_id}.json", envelope)
 
         log.info(f"Response {request_id} written (HTTP {response.status_code})")
 
-    def _handle_streaming(self, request_id: str, method: str, url: str, headers: dict, body: str | None):
-        """Handle a streaming (SSE) request by writing chunk files."""
+    def _write_binary_response(self, request_id: str, status_code: int, headers: dict, chunks: Iterable[bytes]):
+        """Write a <id>.resp file: fixed header, headers, then the body.
+
+        Bodies up to SPOOL_THRESHOLD are written in one go; larger ones are streamed to the
+        file and their length is patched into the header at the end.
+        """
+        name = f"{request_id}.resp"
+        raw_id = bytes.fromhex(request_id)
+        ts_ns = time.time_ns()
+        packed_headers = _pack_headers(headers)
+        buffered: list[bytes] = []
+        size = 0
+        fd = None
+        tmp_path = os.path.join(self._resp_dir_str, name + ".tmp")
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                if fd is not None:
+                    _write_all(fd, chunk)
+                    continue
+                buffered.append(chunk)
+                if size > SPOOL_THRESHOLD:
+                    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY)
+                    _write_all(fd, _RESP_HEADER.pack(raw_id, ts_ns, status_code, len(packed_headers), 0))
+                    _write_all(fd, packed_headers)
+                    for data in buffered:
+                        _write_all(fd, data)
+                    buffered = []
+            if fd is not None:
+                os.lseek(fd, 0, os.SEEK_SET)
+                _write_all(fd, _RESP_HEADER.pack(raw_id, ts_ns, status_code, len(packed_headers), size))
+        except BaseException:
+            if fd is not None:
+                os.close(fd)
+                os.unlink(tmp_path)
+            raise
+
+        if fd is None:
+            head = _RESP_HEADER.pack(raw_id, ts_ns, status_code, len(packed_headers), size)
+            _atomic_write_bytes(self._resp_dir_str, name, b"".join([head, packed_headers, *buffered]))
+            return
+        os.close(fd)
+        os.replace(tmp_path, os.path.join(self._resp_dir_str, name))
+
+    def _read_response_body(self, request_id: str, response: requests.Response) -> tuple[bytes | None, str | None]:
+        """Read the upstream body in chunks; past SPOOL_THRESHOLD it is copied to a <id>.bin sidecar.
+
+        Returns (body, None) for bodies kept in memory, or (None, sidecar file name).
+        """
+        chunks: list[bytes] = []
+        size = 0
+        fd = None
+        name = f"{request_id}.bin"
+        tmp_path = os.path.join(self._resp_dir_str, name + ".tmp")
+        try:
+            for chunk in response.iter_content(COPY_CHUNK_SIZE):
+                if fd is not None:
+                    _write_all(fd, chunk)
+                    continue
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > SPOOL_THRESHOLD:
+                    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY)
+                    for buffered in chunks:
+                        _write_all(fd, buffered)
+                    chunks = []
+        except BaseException:
+            if fd is not None:
+                os.close(fd)
+                os.unlink(tmp_path)
+            raise
+
+        if fd is None:
+            return b"".join(chunks), None
+        os.close(fd)
+        os.replace(tmp_path, os.path.join(self._resp_dir_str, name))
+        return None, name
+
+    def _handle_streaming(self, request_id: str, method: str, url: str, headers: dict, body: bytes | BinaryIO | None):
+        """Handle a streaming (SSE) request by appending frames to a single stream file."""
         response = self.session.request(
             method=method,
             url=url,
             headers=headers,
-            data=body.encode("utf-8") if body else None,
+            data=body,
             timeout=REQUEST_TIMEOUT,
             stream=True,
         )
 
-        seq = 0
-        for line in response.iter_lines(decode_unicode=True):
-            if not line:
-                continue
-            if line.startswith("data: "):
-                data = line[6:]
-                if data.strip() == "[DONE]":
-                    break
-
-                # Write chunk file
-                chunk_file = self.responses_dir / f"{request_id}-{seq:06d}.json"
-                tmp_file = self.responses_dir / f"{request_id}-{seq:06d}.tmp"
-                with open(tmp_file, "w", encoding="utf-8") as f:
-                    f.write(data)
-                tmp_file.rename(chunk_file)
-                seq += 1
-
-        # Signal completion
-        done_file = self.responses_dir / f"{request_id}-done.json"
-        tmp_file = self.responses_dir / f"{request_id}-done.tmp"
-        with open(tmp_file, "w", encoding="utf-8") as f:
-            f.write("{}")
-        tmp_file.rename(done_file)
-
-        log.info(f"Stream {request_id} complete ({seq} chunks)")
-
-    def _write_error_response(self, request_id: str, error_msg: str):
+        # <id>.stream holds length-prefixed frames; the client tails it until <id>-done.json
+        # appears. Frames that arrive in one upstream read share one write to the share, and
+        # nothing is held back waiting for later data.
+        stream_path = os.path.join(self._resp_dir_str, f"{request_id}.stream")
+        fd = os.open(stream_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY)
+        try:
+            frame_count = 0
+            for batch in _iter_sse_batches(_iter_available(response)):
+                _write_all(fd, _encode_frames(batch))
+                frame_count += len(batch)
+        finally:
+            os.close(fd)
+
+        # Signal completion (only after the stream file is closed, so the client can drain it)
+        _atomic_write_bytes(self._resp_dir_str, f"{request_id}-done.json", b"{}")
+
+        log.info(f"Stream {request_id} complete ({frame_count} frames)")
+
+    def fail_request(self, req_path: str, error_msg: str):
+        """Answer a claimed request that could not be handled with a proxy error, then remove it.
+
+        A streaming request gets its done marker instead, so the client ends the stream. A claim
+        that is already gone was handled in full and is left alone.
+        """
+        binary = req_path.endswith(".req")
+        request_id = os.path.basename(req_path).partition(".")[0]
+        try:
+            with open(req_path, "rb") as f:
+                request_data = _read_binary_request(f) if binary else _json_loads(f.read())
+        except FileNotFoundError:
+            return
+        except (ValueError, OSError) as e:
+            log.error(f"Failed to read {os.path.basename(req_path)}: {e}")
+            request_data = {}
+        finally:
+            try:
+                os.unlink(req_path)
+            except OSError:
+                pass
+
+        request_id = request_data.get("id", request_id)
+        if request_data.get("stream"):
+            _atomic_write_bytes(self._resp_dir_str, f"{request_id}-done.json", b"{}")
+        else:
+            self._write_error_response(request_id, error_msg, binary)
+
+    def _write_error_response(self, request_id: str, error_msg: str, binary: bool):
         """Write an error response file."""
-        response_data = {
-            "id": request_id,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "status_code": 502,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps({
-                "error": {
-                    "message": f"Proxy error: {error_msg}",
-                    "type": "proxy_error",
-                }
-            }),
-        }
-        resp_file = self.responses_dir / f"{request_id}.json"
-        tmp_file = self.responses_dir / f"{request_id}.tmp"
-        with open(tmp_file, "w", encoding="utf-8") as f:
-            json.dump(response_data, f)
-        tmp_file.rename(resp_file)
+        error_body = _json_dumps({
+            "error": {
+                "message": f"Proxy error: {error_msg}",
+                "type": "proxy_error",
+            }
+        })
+        if binary:
+            self._write_binary_response(request_id, 502, {"Content-Type": "application/json"}, [error_body])
+            return
+        envelope = _encode_response_envelope(
+            request_id, time.time_ns(), 502, {"Content-Type": "application/json"},
+            base64.b64encode(error_body),
+        )
+        _atomic_write_bytes(self._resp_dir_str, f"{request_id}.json", envelope)
+
+
+class FileSystemProxyServer:
+    """Watches for request files and forwards them to the AI model API."""
+
+    def __init__(self, queue_dir: str, api_base: str, api_key: str | None = None,
+                 ignore_cert_errors: bool = False, worker_processes: int = 0, server_id: str | None = None):
+        self.queue_dir = Path(queue_dir)
+        self.requests_dir = self.queue_dir / "requests"
+        # Requests are claimed by moving them here, so each file is only processed once. Each
+        # server has its own directory, so a restart can requeue exactly its own unfinished claims.
+        self.server_id = server_id or socket.gethostname()
+        self.in_flight_root = self.requests_dir / "in_flight"
+        self.in_flight_dir = self.in_flight_root / self.server_id
+        self.responses_dir = self.queue_dir / "responses"
+        self._req_dir_str = str(self.requests_dir)
+        self._in_flight_dir_str = str(self.in_flight_dir)
+        self._resp_dir_str = str(self.responses_dir)
+        self.api_base = api_base.rstrip("/")
+
+        # Set by the watchdog handler when a request file shows up
+        self.wakeup = threading.Event()
+
+        # Create dirs
+        self.requests_dir.mkdir(parents=True, exist_ok=True)
+        self.in_flight_dir.mkdir(parents=True, exist_ok=True)
+        self.responses_dir.mkdir(parents=True, exist_ok=True)
+
+        # Bounded worker pool; a slot is held from pickup until the request is done.
+        # Worker processes each build their own forwarder (and session) on startup; the one
+        # here then only answers requests lost with a dead worker.
+        forwarder_args = (self._req_dir_str, self._resp_dir_str, self.api_base, api_key, ignore_cert_errors)
+        self.forwarder = UpstreamForwarder(*forwarder_args, pool_size=1 if worker_processes else MAX_WORKERS)
+        if worker_processes:
+            self._new_executor = partial(
+                ProcessPoolExecutor,
+                max_workers=worker_processes,
+                initializer=_init_worker_process,
+                initargs=forwarder_args,
+            )
+            self._process = _process_in_worker
+            workers = worker_processes
+        else:
+            self._new_executor = partial(ThreadPoolExecutor, max_workers=MAX_WORKERS, thread_name_prefix="fsproxy")
+            self._process = self.forwarder.process_request
+            workers = MAX_WORKERS
+        self.executor = self._new_executor()
+        self.slots = threading.BoundedSemaphore(workers * PENDING_PER_WORKER)
+
+        if ignore_cert_errors:
+            log.warning("TLS certificate verification is disabled")
+
+        log.info(f"Queue directory: {self.queue_dir} (server id {self.server_id})")
+        log.info(f"API base: {self.api_base}")
+        if worker_processes:
+            log.info(f"Using {worker_processes} worker processes")
 
     def scan_and_process(self):
         """Scan for new request files and process them."""
         try:
-            for req_file in sorted(self.requests_dir.glob("*.json")):
-                fname = req_file.name
-                with self.lock:
-                    if fname in self.processed:
+            with os.scandir(self._req_dir_str) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(_REQUEST_EXTS):
                         continue
-                    self.processed.add(fname)
-
-                # Process in a thread
-                thread = threading.Thread(
-                    target=self.process_request,
-                    args=(req_file,),
-                    daemon=True,
-                )
-                thread.start()
+                    if not self.slots.acquire(blocking=False):
+                        # Enough work in flight; leave the rest on disk for the next scan
+                        break
+
+                    # The rename is atomic: whoever moves the file first owns the request
+                    claimed = os.path.join(self._in_flight_dir_str, entry.name)
+                    try:
+                        os.rename(entry.path, claimed)
+                    except OSError:
+                        self.slots.release()
+                        continue
+
+                    try:
+                        future = self.executor.submit(self._process, claimed)
+                    except BrokenProcessPool:
+                        # A worker process died (OOM, killed). This request never started, so
+                        # hand it back and start a fresh pool; the next scan picks it up again
+                        log.error(f"Worker process pool is broken, restarting it in {POOL_RESTART_DELAY}s")
+                        self._requeue(claimed)
+                        self.slots.release()
+                        self.executor.shutdown(wait=False)
+                        time.sleep(POOL_RESTART_DELAY)
+                        self.executor = self._new_executor()
+                        break
+                    future.add_done_callback(partial(self._request_done, claimed))
         except OSError as e:
             log.error(f"Error scanning queue: {e}")
 
+    def _request_done(self, claimed: str, future):
+        """Free a pending slot and rescan, so requests held back by backpressure are picked up.
+
+        A request cancelled at shutdown is handed back to the queue. One lost with a dead worker
+        process is answered with an error instead: it may have been the cause, or may already
+        have reached the upstream API, so it is not retried.
+        """
+        if future.cancelled():
+            self._requeue(claimed)
+            exc = None
+        else:
+            exc = future.exception()
+        if isinstance(exc, BrokenProcessPool):
+            log.error(f"Worker process lost while handling {os.path.basename(claimed)}")
+            self.forwarder.fail_request(claimed, "worker process died")
+        elif exc is not None:
+            log.error(f"Unhandled error processing {os.path.basename(claimed)}", exc_info=exc)
+        self.slots.release()
+        self.wakeup.set()
+
+    def _requeue(self, claimed: str):
+        """Move a claimed request that was not handled back into requests/ (if it is still there)."""
+        try:
+            os.rename(claimed, os.path.join(self._req_dir_str, os.path.basename(claimed)))
+        except OSError:
+            pass
+
+    def requeue_in_flight(self):
+        """Hand back the claims this server left unfinished when it last stopped."""
+        with os.scandir(self._in_flight_dir_str) as entries:
+            names = [entry.name for entry in entries if entry.name.endswith(_REQUEST_EXTS)]
+        for name in names:
+            self._requeue(os.path.join(self._in_flight_dir_str, name))
+        if names:
+            log.info(f"Requeued {len(names)} unfinished request(s) from the previous run")
+
     def run(self):
-        """Main loop: continuously scan for new requests."""
+        """Main loop: scan for new requests whenever woken up or the poll interval expires."""
+        observer = self._start_observer()
+        interval = FALLBACK_POLL_INTERVAL if observer else POLL_INTERVAL
         log.info("Watching for requests... (Ctrl+C to stop)")
         try:
             while True:
                 self.scan_and_process()
-                time.sleep(POLL_INTERVAL)
+                self.wakeup.wait(interval)
+                self.wakeup.clear()
         except KeyboardInterrupt:
-            log.info("Shutting down")
+            log.info("Shutting down (waiting for in-flight requests)")
+        finally:
+            if observer:
+                observer.stop()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _start_observer(self):
+        """Start a watchdog observer on the requests directory, if watchdog is installed."""
+        if Observer is None:
+            log.info(f"watchdog not installed, polling every {POLL_INTERVAL}s")
+            return None
+        observer = Observer()
+        # Recursive so claim renames into in_flight/ are seen as complete moves; otherwise
+        # watchdog holds the unpaired move-out back and delays the events queued behind it
+        handler = _RequestEventHandler(self.wakeup, self._req_dir_str)
+        observer.schedule(handler, self._req_dir_str, recursive=True)
+        try:
+            observer.start()
+        except OSError as e:
+            log.warning(f"Filesystem events unavailable ({e}), polling every {POLL_INTERVAL}s")
+            return None
+        log.info("Using filesystem events for new requests")
+        return observer
 
     def cleanup_stale(self, max_age_seconds: int = 3600):
         """Clean up old request/response files."""
         now = time.time()
-        for directory in [self.requests_dir, self.responses_dir]:
+        # in_flight/ itself, and every server's claim directory under it
+        in_flight_dirs = [d for d in self.in_flight_root.glob("*") if d.is_dir()]
+        for directory in [self.requests_dir, self.in_flight_root, *in_flight_dirs, self.responses_dir]:
             for f in directory.glob("*"):
+                if f.is_dir():
+                    continue
                 try:
                     age = now - f.stat().st_mtime
                     if age > max_age_seconds:
@@ -228,6 +703,39 @@ class FileSystemProxyServer:
                     pass
 
 
+# Per-process forwarder used when requests are handled in worker processes
+_worker_forwarder: UpstreamForwarder | None = None
+
+
+def _init_worker_process(*forwarder_args):
+    global _worker_forwarder
+    _worker_forwarder = UpstreamForwarder(*forwarder_args, pool_size=1)
+
+
+def _process_in_worker(req_path: str):
+    _worker_forwarder.process_request(req_path)
+
+
+class _RequestEventHandler(FileSystemEventHandler):
+    """Wakes the server loop when a request file is created or renamed into place."""
+
+    def __init__(self, wakeup: threading.Event, requests_dir: str):
+        super().__init__()
+        self.wakeup = wakeup
+        self.requests_dir = requests_dir
+
+    def _is_request(self, path: str) -> bool:
+        return path.endswith(_REQUEST_EXTS) and os.path.dirname(path) == self.requests_dir
+
+    def on_created(self, event):
+        if self._is_request(event.src_path):
+            self.wakeup.set()
+
+    def on_moved(self, event):
+        if self._is_request(event.dest_path):
+            self.wakeup.set()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Filesystem Proxy Server")
     parser.add_argument("--queue-dir", default=DEFAULT_QUEUE_DIR, help="Shared drive queue directory")
@@ -236,6 +744,10 @@ def main():
     parser.add_argument("--cleanup-interval", type=int, default=300, help="Stale file cleanup interval in seconds")
     parser.add_argument("--ignore-cert-errors", action="store_true",
                         help="Disable TLS certificate verification for upstream API requests")
+    parser.add_argument("--worker-processes", type=int, default=0,
+                        help="Handle requests in this many worker processes instead of threads")
+    parser.add_argument("--server-id", default=None,
+                        help="Name of this server's in_flight directory (default: host name); unique per server")
     args = parser.parse_args()
 
     server = FileSystemProxyServer(
@@ -243,6 +755,8 @@ def main():
         api_base=args.api_base,
         api_key=args.api_key,
         ignore_cert_errors=args.ignore_cert_errors,
+        worker_processes=args.worker_processes,
+        server_id=args.server_id,
     )
 
     # Periodic cleanup thread
@@ -254,8 +768,9 @@ def main():
     cleanup_thread = threading.Thread(target=cleanup_loop, daemon=True)
     cleanup_thread.start()
 
-    # Clean up anything stale from previous runs
+    # Clean up anything stale from previous runs, then retry what this server left unfinished
     server.cleanup_stale()
+    server.requeue_in_flight()
 
     server.run()
 